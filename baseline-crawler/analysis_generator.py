@@ -72,7 +72,7 @@ def main():
             analysis = generate_analysis_for_domain(domain, db_file)
             json_file = data_dir / f"{domain}_analysis.json"
             with open(json_file, 'w') as f:
-                json.dump(analysis, f, indent=4)
+                f.write(json.dumps(analysis, indent=4))
             print(f"Saved analysis to {json_file}")
         except Exception as e:
             print(f"Error generating analysis for {domain}: {e}")
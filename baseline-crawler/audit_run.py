@@ -129,7 +129,7 @@ def main():
         }
 
     with open('fetch_failures.json', 'w') as f:
-        json.dump(fetch_failures, f, indent=4)
+        f.write(json.dumps(fetch_failures, indent=4))
 
     # Create db_summary.json
     db_summary = {
@@ -144,7 +144,7 @@ def main():
         }
 
     with open('db_summary.json', 'w') as f:
-        json.dump(db_summary, f, indent=4)
+        f.write(json.dumps(db_summary, indent=4))
 
     # Print per-domain summaries
     for domain, data in domains_data.items():
@@ -42,13 +42,14 @@ class CompareEngine:
         canon_url = _canon(url)
         canon_url_slash = canon_url if canon_url.endswith("/") else canon_url + "/"
         canon_url_noslash = canon_url.rstrip("/")
-        
-        observed_hash = sha256(normalize_html(html))
+
+        # normalize_html is a full BeautifulSoup parse; only pay for it
+        # once a defacement row actually matches this URL
+        observed_hash = None
 
         print(f"[COMPARE] Checking {url}")
         print(f"[COMPARE]   Canonical: {canon_url}")
         print(f"[COMPARE]   Also checking: {canon_url_slash} and {canon_url_noslash}")
-        print(f"[COMPARE]   Observed hash: {observed_hash}")
 
         matched = False
         for row in rows:
@@ -64,6 +65,10 @@ class CompareEngine:
             baseline_id = row["baseline_id"]
             print(f"[COMPARE]   [MATCH] URL matched! baseline_id={baseline_id}")
 
+            if observed_hash is None:
+                observed_hash = sha256(normalize_html(html))
+                print(f"[COMPARE]   Observed hash: {observed_hash}")
+
             # Try both versions of the URL for baseline lookup
             baseline = (
                 get_baseline_hash(site_id=siteid, normalized_url=canon_url, base_url=base_url)
@@ -28,3 +28,23 @@ except NameError:
 # Worker scaling parameters
 MIN_WORKERS = 5
 MAX_WORKERS = 50
+
+# Also write every blocked URL to data/blocked_urls/ (one file per worker
+# thread); counts per block type are always kept
+TRACK_BLOCKED_URLS = False
+
+# crawl_pages rows each worker buffers before writing them in one INSERT
+CRAWL_PAGE_BATCH_SIZE = 50
+
+# JS rendering: number of render threads, each with its own Chromium
+RENDER_POOL_SIZE = 3
+
+# Chromium profile root for persistent contexts; keeps the HTTP disk cache
+# across crawler runs. Cookies, storage and service workers are wiped on
+# every launch. Set to None for throwaway in-memory contexts.
+PW_USER_DATA_DIR = Path(DATA_DIR) / "playwright-profile"
+
+# Record/replay of JS-render sub-resources (see crawler/replay_cache.py):
+# "off", "record", "replay" or "on". Routing disables Chromium's HTTP cache
+# and replayed scripts can hide a live change, so keep "off" for COMPARE.
+RECORD_REPLAY = "off"
@@ -18,7 +18,7 @@ def fetch(url, discovered_from=None, depth=0):
     retry_delay = 2  # Start with 2 seconds
 
     for attempt in range(max_retries + 1):
-        start_time = time.time()
+        start_time = time.monotonic()
         try:
             r = requests.get(
                 url,
@@ -28,7 +28,7 @@ def fetch(url, discovered_from=None, depth=0):
                 allow_redirects=True,
             )
 
-            fetch_time_ms = int((time.time() - start_time) * 1000)
+            fetch_time_ms = int((time.monotonic() - start_time) * 1000)
             response_size = len(r.content)
             content_type = r.headers.get("Content-Type", "").lower()
 
@@ -67,7 +67,7 @@ def fetch(url, discovered_from=None, depth=0):
                 "success": False,
                 "error": "timeout",
                 "content_type": "",
-                "fetch_time_ms": int((time.time() - start_time) * 1000),
+                "fetch_time_ms": int((time.monotonic() - start_time) * 1000),
             }
 
         except requests.exceptions.ConnectionError:
@@ -75,7 +75,7 @@ def fetch(url, discovered_from=None, depth=0):
                 "success": False,
                 "error": "connection error",
                 "content_type": "",
-                "fetch_time_ms": int((time.time() - start_time) * 1000),
+                "fetch_time_ms": int((time.monotonic() - start_time) * 1000),
             }
 
         except requests.exceptions.RequestException as e:
@@ -83,6 +83,6 @@ def fetch(url, discovered_from=None, depth=0):
                 "success": False,
                 "error": str(e),
                 "content_type": "",
-                "fetch_time_ms": int((time.time() - start_time) * 1000),
+                "fetch_time_ms": int((time.monotonic() - start_time) * 1000),
             }
 
@@ -3,10 +3,22 @@ Detect whether a page requires JavaScript rendering.
 Used to escalate React / SPA pages only when necessary.
 """
 
+# Large pages with plenty of links are server-rendered; skip the full scan
+LARGE_PAGE_CHARS = 50_000
+LARGE_PAGE_MIN_LINKS = 20
+
+
 def needs_js_rendering(html: str) -> bool:
     if not html:
         return True
 
+    # Cheap preflight before allocating a lowercased copy
+    if (
+        len(html) > LARGE_PAGE_CHARS and
+        html.count("<a ") > LARGE_PAGE_MIN_LINKS
+    ):
+        return False
+
     h = html.lower()
 
     # Explicit SPA roots
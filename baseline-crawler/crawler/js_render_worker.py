@@ -1,42 +1,96 @@
+import atexit
 import threading
 import queue
-from crawler.js_renderer import render_js_sync
+from concurrent.futures import Future
+from crawler.config import RENDER_POOL_SIZE
+from crawler.js_renderer import render_js_sync, shutdown_thread_browser
 from crawler.normalizer import normalize_rendered_html
 
 
-class JSRenderWorker(threading.Thread):
-    def __init__(self):
-        super().__init__(daemon=True)
-        self.queue = queue.Queue()
-        self.start()
+class JSRenderWorker:
+    """
+    Pool of render threads sharing one request queue.
+    Each thread owns its own Playwright browser (see js_renderer).
+    """
+
+    def __init__(self, pool_size: int = RENDER_POOL_SIZE):
+        # SimpleQueue: no unfinished-task bookkeeping, nobody joins on it
+        self.queue = queue.SimpleQueue()
+        # url -> pending result, so concurrent callers share one render
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._closed = False
+
+        self.threads = []
+        for i in range(pool_size):
+            t = threading.Thread(target=self.run, name=f"JSRender-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+        # Close Chromium cleanly instead of leaving orphaned processes
+        atexit.register(self.shutdown)
 
     def run(self):
+        try:
+            self._serve()
+        finally:
+            shutdown_thread_browser()
+
+    def _serve(self):
         while True:
-            url, result_event = self.queue.get()
+            item = self.queue.get()
+            if item is None:
+                return
+            url, fut = item
             try:
                 html = normalize_rendered_html(render_js_sync(url))
-                result_event["html"] = html
             except Exception as e:
-                result_event["error"] = e
-            finally:
-                result_event["done"].set()
-                self.queue.task_done()
+                with self._inflight_lock:
+                    self._inflight.pop(url, None)
+                fut.set_exception(e)
+            else:
+                with self._inflight_lock:
+                    self._inflight.pop(url, None)
+                fut.set_result(html)
 
-    # ✅ THIS MUST BE INSIDE THE CLASS
     def render(self, url: str, timeout: int = 30) -> str:
-     event = {
-        "done": threading.Event(),
-        "html": None,
-        "error": None,
-     }
+        with self._inflight_lock:
+            if self._closed:
+                raise RuntimeError("JS render pool is shut down")
+            fut = self._inflight.get(url)
+            if fut is None:
+                fut = Future()
+                self._inflight[url] = fut
+                self.queue.put((url, fut))
 
-     self.queue.put((url, event))
-     event["done"].wait(timeout=timeout)
+        # Raises TimeoutError instead of silently returning None
+        return fut.result(timeout=timeout)
 
-     if event["error"]:
-        raise event["error"]
+    def shutdown(self, timeout: float = 10):
+        """
+        Stop every render thread and fail any request still queued.
+        Safe to call more than once.
+        """
+        with self._inflight_lock:
+            if self._closed:
+                return
+            self._closed = True
 
-     return event["html"]
+        # No new requests can be queued once _closed is set, so fail the
+        # backlog first; draining after the stop markers would also eat the
+        # markers of threads still busy rendering, leaving them blocked on
+        # get() with their browser never closed
+        while True:
+            try:
+                _, fut = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            fut.set_exception(RuntimeError("JS render pool is shut down"))
 
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join(timeout=timeout)
 
-    
+        with self._inflight_lock:
+            self._inflight.clear()
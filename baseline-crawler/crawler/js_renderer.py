@@ -1,42 +1,302 @@
 """
 Synchronous JS renderer using Playwright.
 Designed for threaded crawlers (NO async in workers).
+
+Playwright sync objects are bound to the thread that created them, so every
+render thread owns its own driver, browser and context (thread-local).
 """
 
+import os
+import shutil
 import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, fall back to per-process profiles
+    fcntl = None
+
 from playwright.sync_api import sync_playwright
+from crawler.config import PW_USER_DATA_DIR, RECORD_REPLAY
+from crawler.replay_cache import replay_route
+
+_local = threading.local()
+
+# A page is reused for this many navigations before being replaced.
+# Fresh BrowserContext after this many pages, fresh Chromium after this
+# many renders; both cap the memory Playwright/Chromium accumulate.
+# With a persistent profile the context IS the browser (closing it
+# relaunches Chromium), so only BROWSER_MAX_RENDERS applies there.
+PAGE_MAX_NAVIGATIONS = 10
+CONTEXT_MAX_PAGES = 50
+BROWSER_MAX_RENDERS = 200
+
+# Context-wide Playwright timeouts: navigation, and every other wait
+NAVIGATION_TIMEOUT_MS = 30000
+WAIT_TIMEOUT_MS = 8000
+
+# Sub-resources that never affect the rendered DOM.
+# Blocked inside Chromium via CDP, so no Python callback runs per request
+# and, unlike page.route, Chromium's HTTP cache stays enabled.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.mp4", "*.webm", "*.mp3",
+    "*.css",
+]
+
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0 Safari/537.36"
+)
+
+# Context-level setting: override via env without touching render code
+BROWSER_USER_AGENT = os.getenv("RENDER_USER_AGENT", DEFAULT_USER_AGENT)
+
+BROWSER_ARGS = [
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    # Headless-crawl trimming: no images, GPU canvas, or background work
+    "--disable-setuid-sandbox",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-webgl",
+    "--disable-accelerated-2d-canvas",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-popup-blocking",
+    "--disable-features=TranslateUI",
+    "--mute-audio",
+]
+
+# Site state wiped from a persistent profile before every launch: only
+# the HTTP disk cache may carry over, never cookies, storage or service
+# workers (a service worker could serve COMPARE a stale document)
+PROFILE_STATE_DIRS = (
+    "Cookies", "Cookies-journal",
+    "Local Storage", "Session Storage", "IndexedDB",
+    "Service Worker", "Storage", "databases", "File System",
+)
+
+# Profile dirs tried per render thread before giving up on reuse; lets
+# several crawler processes (e.g. BASELINE + COMPARE) run side by side
+PROFILE_SLOTS = 8
+
+# First element that signals real content has been committed to the DOM
+CONTENT_ANCHOR_SELECTOR = (
+    "main, article, [role=main], #root > *, #app > *, #__next > *, app-root > *"
+)
+
+
+def _new_context(browser):
+    _local.context_pages = 0
+    return browser.new_context(user_agent=BROWSER_USER_AGENT)
+
 
-_browser = None
-_context = None
-_lock = threading.Lock()
+def _claim_profile_dir():
+    """
+    Pick and lock a Chromium profile dir for this render thread.
+    Thread names are stable, so the disk cache survives restarts; the
+    flock keeps a concurrent crawler process off a profile Chromium has
+    already locked, sending it to the next slot instead.
+    """
+    base = PW_USER_DATA_DIR / threading.current_thread().name
+
+    if fcntl is not None:
+        for slot in range(PROFILE_SLOTS):
+            user_data_dir = base if slot == 0 else base.with_name(f"{base.name}.{slot}")
+            user_data_dir.mkdir(parents=True, exist_ok=True)
+            lock = open(user_data_dir / ".crawler.lock", "w")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                continue
+            _local.profile_lock = lock
+            return user_data_dir
+
+    # No flock, or every slot busy: private per-process profile, removed
+    # again in shutdown_thread_browser()
+    user_data_dir = base.with_name(f"{base.name}.pid{os.getpid()}")
+    user_data_dir.mkdir(parents=True, exist_ok=True)
+    _local.profile_is_private = True
+    return user_data_dir
+
+
+def _reset_profile_state(user_data_dir):
+    # Chromium is not running on this profile (we hold its slot), so the
+    # state can be removed from disk; "Default" is Chromium's profile name
+    for name in PROFILE_STATE_DIRS:
+        path = user_data_dir / "Default" / name
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _launch_persistent_context():
+    # Claimed once per thread and kept across browser relaunches
+    if getattr(_local, "profile_dir", None) is None:
+        _local.profile_dir = _claim_profile_dir()
+
+    _reset_profile_state(_local.profile_dir)
+
+    _local.context_pages = 0
+    _local.renders = 0
+    context = _local.playwright.chromium.launch_persistent_context(
+        str(_local.profile_dir),
+        headless=True,
+        args=BROWSER_ARGS,
+        user_agent=BROWSER_USER_AGENT,
+        service_workers="block",
+    )
+    context.clear_cookies()
+    # A persistent context opens with one blank page; use it first
+    _local.initial_page = context.pages[0] if context.pages else None
+    return context
 
 
 def _ensure_browser():
-    global _browser, _context
+    if getattr(_local, "context", None):
+        return _local.context
 
-    if _browser and _context:
-        return
+    if getattr(_local, "playwright", None) is None:
+        _local.playwright = sync_playwright().start()
 
-    with _lock:
-        if _browser and _context:
-            return
-
-        p = sync_playwright().start()
-        _browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-gpu",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
-        _context = _browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0 Safari/537.36"
+    if PW_USER_DATA_DIR:
+        # Persistent context owns its browser; closing it relaunches Chromium
+        context = _launch_persistent_context()
+    else:
+        if getattr(_local, "browser", None) is None:
+            _local.browser = _local.playwright.chromium.launch(
+                headless=True,
+                args=BROWSER_ARGS,
             )
-        )
+            _local.renders = 0
+        context = _new_context(_local.browser)
+
+    # Set once per context instead of passing timeout= on every call
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    context.set_default_timeout(WAIT_TIMEOUT_MS)
+
+    # One interception setup per context, shared by all of its pages
+    if RECORD_REPLAY != "off":
+        context.route("**/*", replay_route)
+
+    _local.context = context
+    return context
+
+
+def _ensure_page(context):
+    page = getattr(_local, "page", None)
+    if page is not None:
+        return page
+
+    # Per-page setup runs once per page, not once per URL
+    page = getattr(_local, "initial_page", None)
+    _local.initial_page = None
+    if page is None:
+        page = context.new_page()
+    cdp = context.new_cdp_session(page)
+    cdp.send("Network.enable")
+    cdp.send("Network.setCacheDisabled", {"cacheDisabled": False})
+    cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    _local.page = page
+    _local.page_navs = 0
+    return page
+
+
+def _close_page():
+    page = getattr(_local, "page", None)
+    _local.page = None
+    if page is None:
+        return
+    try:
+        page.close()
+    except Exception:
+        pass
+
+
+def _recycle_context():
+    # Closing the context (not just pages) flushes accumulated renderer state
+    _close_page()
+    try:
+        _local.context.close()
+    except Exception:
+        pass
+    _local.context = None
+    _local.initial_page = None
+
+
+def _close_browser():
+    if getattr(_local, "context", None):
+        _recycle_context()
+    try:
+        if getattr(_local, "browser", None):
+            _local.browser.close()
+    except Exception:
+        pass
+    _local.browser = None
+
+
+def _recycle_browser():
+    print(
+        f"[JS-RENDER] {threading.current_thread().name}: "
+        f"relaunching browser after {_local.renders} renders"
+    )
+    _close_browser()
+
+
+def shutdown_thread_browser():
+    """
+    Close the calling thread's page, context, browser and Playwright driver.
+    Must run on the render thread that owns them.
+    """
+    _close_browser()
+    try:
+        if getattr(_local, "playwright", None):
+            _local.playwright.stop()
+    except Exception:
+        pass
+    _local.playwright = None
+
+    lock = getattr(_local, "profile_lock", None)
+    profile_dir = getattr(_local, "profile_dir", None)
+    private = getattr(_local, "profile_is_private", False)
+    _local.profile_lock = None
+    _local.profile_dir = None
+    _local.profile_is_private = False
+    if lock is not None:
+        lock.close()
+    if private and profile_dir is not None:
+        # Nothing can reuse a per-process profile; don't leave it behind
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def _advance_and_recycle(page, rendered: bool):
+    _local.renders += 1
+    _local.context_pages += 1
+    _local.page_navs += 1
+
+    if _local.renders >= BROWSER_MAX_RENDERS:
+        _recycle_browser()
+    elif not PW_USER_DATA_DIR and _local.context_pages >= CONTEXT_MAX_PAGES:
+        _recycle_context()
+    elif not rendered or _local.page_navs >= PAGE_MAX_NAVIGATIONS:
+        # A failed page is never reused
+        _close_page()
+    else:
+        # Blank the page to free its DOM before the next navigation
+        try:
+            page.goto("about:blank")
+        except Exception:
+            _close_page()
 
 
 def render_js_sync(url: str) -> str:
@@ -44,24 +304,42 @@ def render_js_sync(url: str) -> str:
     Render a URL using Playwright and return rendered HTML.
     Blocks the calling thread briefly.
     """
-    _ensure_browser()
+    context = _ensure_browser()
+    page = None
 
-    page = _context.new_page()
+    rendered = False
     try:
-        page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        page = _ensure_page(context)
+        page.goto(url, wait_until="domcontentloaded")
 
-        # Wait for React/Vue/Angular hydration
+        # Wait for React/Vue/Angular hydration: one event-driven wait for the
+        # network to go quiet instead of polling the DOM over CDP
         try:
-            page.wait_for_function(
-                "() => document.body && document.body.children.length > 0",
-                timeout=8000,
-            )
+            page.wait_for_load_state("networkidle")
         except Exception:
             pass
 
-        # Extra micro-wait for React commit phase
-        page.wait_for_timeout(1000)
+        # React commit phase: return as soon as a content anchor exists,
+        # waiting at most as long as the old fixed 1s pause
+        try:
+            page.wait_for_selector(
+                CONTENT_ANCHOR_SELECTOR, state="attached", timeout=1000
+            )
+        except Exception:
+            pass
 
-        return page.content()
+        html = page.content()
+        rendered = True
+        return html
     finally:
-        page.close()
+        if page is None:
+            # No page could be opened: the context or Chromium itself is
+            # dead. Drop both so the next render relaunches cleanly.
+            print(
+                f"[JS-RENDER] {threading.current_thread().name}: "
+                "page setup failed, relaunching browser"
+            )
+            _close_browser()
+        else:
+            _advance_and_recycle(page, rendered)
+
@@ -7,14 +7,62 @@ IMPORTANT:
 - normalize_html() → ONLY for hashing / diffing
 """
 
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse, urljoin
 from bs4 import BeautifulSoup
 
+# normalize_url / get_canonical_id are pure and called for every link on
+# every page; within a site the same (url, base, preference) recurs a lot.
+URL_CACHE_SIZE = 131072
+
 
 # ============================================================
 # URL NORMALIZATION (FOR FETCHING)
 # ============================================================
 
+@lru_cache(maxsize=64)
+def _preference_netloc(preference_url: str) -> tuple[str, str]:
+    """(netloc, bare host without port/www) of a preference URL."""
+    pref = urlparse(
+        preference_url
+        if "://" in preference_url
+        else "https://" + preference_url
+    )
+    netloc = pref.netloc.lower()
+    host = netloc.split(":")[0]
+    return netloc, host[4:] if host.startswith("www.") else host
+
+
+def _split_normalized(url: str) -> tuple[str, str, str]:
+    """
+    (netloc, path, query) of a normalize_url() result, exactly as
+    urlparse() would split it (netloc lowercased, ';params' dropped).
+
+    The usual shape 'https://netloc/path[?query]' is sliced directly.
+    Anything else goes through urlparse(). For example, an empty netloc
+    with a '//' path comes back as 'https://host' with no slash after it.
+    """
+    rest = url[len("https://"):]
+    i = rest.find("/")
+    if (
+        not url.startswith("https://")
+        or i < 0
+        or "?" in rest[:i]
+        or "[" in rest[:i]
+        or "]" in rest[:i]
+    ):
+        parsed = urlparse(url)
+        return parsed.netloc.lower(), parsed.path, parsed.query
+
+    path, _, query = rest[i:].partition("?")
+    # urlparse: params start at the first ';' of the LAST path segment
+    semi = path.find(";", path.rfind("/"))
+    if semi >= 0:
+        path = path[:semi]
+    return rest[:i].lower(), path, query
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def normalize_url(
     url: str,
     *,
@@ -52,25 +100,16 @@ def normalize_url(
 
     # Apply domain preference (www vs non-www)
     if preference_url:
-        pref = urlparse(
-            preference_url
-            if "://" in preference_url
-            else "https://" + preference_url
-        )
+        pref_netloc, base_pref = _preference_netloc(preference_url)
 
         clean_netloc = netloc.split(":")[0]
-        clean_pref = pref.netloc.lower().split(":")[0]
-
         base_netloc = clean_netloc[4:] if clean_netloc.startswith("www.") else clean_netloc
-        base_pref = clean_pref[4:] if clean_pref.startswith("www.") else clean_pref
 
         if base_netloc == base_pref:
-            netloc = pref.netloc.lower()
+            netloc = pref_netloc
 
     # Normalize path
-    path = parsed.path or "/"
-    if path != "/" and path.endswith("/"):
-        path = path.rstrip("/")
+    path = parsed.path.rstrip("/") or "/"
 
     query = parsed.query
 
@@ -88,6 +127,7 @@ def normalize_url(
 # CANONICAL DB ID (NO SCHEME)
 # ============================================================
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def get_canonical_id(url: str, base_url: str | None = None) -> str:
     """
     Returns a stable DB identifier: 'domain/path?query'
@@ -102,28 +142,20 @@ def get_canonical_id(url: str, base_url: str | None = None) -> str:
 
     # First normalize fully
     url = normalize_url(url, preference_url=base_url)
-    parsed = urlparse(url)
-
-    netloc = parsed.netloc.lower()
+    netloc, path, query = _split_normalized(url)
 
     # Enforce base_url domain if equivalent
     if base_url:
-        base_parsed = urlparse(
-            normalize_url(base_url)
-        )
+        base_netloc = _split_normalized(normalize_url(base_url))[0]
 
         clean_netloc = netloc[4:] if netloc.startswith("www.") else netloc
-        clean_base = (
-            base_parsed.netloc.lower()[4:]
-            if base_parsed.netloc.lower().startswith("www.")
-            else base_parsed.netloc.lower()
-        )
+        clean_base = base_netloc[4:] if base_netloc.startswith("www.") else base_netloc
 
         if clean_netloc == clean_base:
-            netloc = base_parsed.netloc.lower()
+            netloc = base_netloc
 
-    path = parsed.path.strip("/")
-    query = f"?{parsed.query}" if parsed.query else ""
+    path = path.strip("/")
+    query = f"?{query}" if query else ""
 
     if path:
         return f"{netloc}/{path}{query}"
@@ -131,6 +163,13 @@ def get_canonical_id(url: str, base_url: str | None = None) -> str:
         return f"{netloc}{query}"
 
 
+def clear_normalizer_caches():
+    """Drop memoized URLs, e.g. between sites, to bound memory."""
+    normalize_url.cache_clear()
+    get_canonical_id.cache_clear()
+    _preference_netloc.cache_clear()
+
+
 # ============================================================
 # HTML NORMALIZATION (HASHING / DIFF ONLY)
 # ============================================================
@@ -149,12 +188,10 @@ def normalize_html(html: str) -> str:
     for tag in soup(["script", "style", "noscript"]):
         tag.decompose()
 
-    # Normalize whitespace
+    # Normalize whitespace (strip each line once, drop blank ones)
     normalized = soup.prettify()
     normalized = "\n".join(
-        line.strip()
-        for line in normalized.splitlines()
-        if line.strip()
+        filter(None, map(str.strip, normalized.splitlines()))
     )
 
     return normalized
@@ -164,6 +201,11 @@ def normalize_html(html: str) -> str:
 # JS RENDER NORMALIZATION (DISPLAY ONLY)
 # ============================================================
 
+# Legacy: rendered HTML once arrived JSON-escaped. page.content() returns
+# decoded HTML, where a literal "\\n" belongs to inline scripts.
+NORMALIZE_ESCAPES = False
+
+
 def normalize_rendered_html(html: str) -> str:
     """
     Cleanup for JS-rendered HTML.
@@ -172,7 +214,7 @@ def normalize_rendered_html(html: str) -> str:
     if not html:
         return ""
 
-    if "\\n" in html:
+    if NORMALIZE_ESCAPES:
         html = html.replace("\\n", "\n")
 
     return html.strip()
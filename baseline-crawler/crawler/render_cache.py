@@ -1,40 +1,116 @@
 """
 In-memory cache for JS-rendered pages.
 Prevents repeated Playwright renders.
+Bounded LRU: least recently used entries are evicted past CACHE_MAX_ENTRIES.
+HTML is stored zlib-compressed (level 1) to keep memory low.
+Expiry uses the monotonic clock; expired entries are swept lazily via a heap.
+Keys are canonical URLs, so tracking-parameter variants share one render.
 """
 
 import time
+import heapq
 import threading
 import hashlib
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 
 CACHE_TTL_SECONDS = 60 * 60 * 12  # 12 hours
+CACHE_MAX_ENTRIES = 2_000
+CACHE_COMPRESS_LEVEL = 1  # fastest; HTML still shrinks several times
+PURGE_EVERY_WRITES = 1_000
 
-_cache = {}
+_TTL_NS = CACHE_TTL_SECONDS * 1_000_000_000
+
+_cache = OrderedDict()  # key -> (blob, expiry_ns)
+_expiry_heap = []       # (expiry_ns, key); may hold stale pairs
+_writes = 0
 _lock = threading.Lock()
 
+# Query params that never change what a page renders
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "_"}
+
+
+def canonical_render_url(url: str) -> str:
+    """
+    Cache identity for a rendered page:
+    lowercase scheme/host, no fragment, no utm_* / click-id params.
+    """
+    p = urlparse(url)
+    query = urlencode([
+        (k, v)
+        for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    ])
+    return urlunparse((
+        p.scheme.lower(),
+        p.netloc.lower(),
+        p.path,
+        p.params,
+        query,
+        "",
+    ))
+
 
 def _cache_key(url: str) -> str:
-    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return hashlib.blake2b(
+        canonical_render_url(url).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
+
+def _purge_expired_locked(now_ns: int):
+    while _expiry_heap and _expiry_heap[0][0] <= now_ns:
+        expiry_ns, key = heapq.heappop(_expiry_heap)
+        entry = _cache.get(key)
+        # Skip pairs left behind by re-sets or LRU eviction
+        if entry and entry[1] == expiry_ns:
+            del _cache[key]
+
+    # Keep the heap from outgrowing the cache with stale pairs
+    if len(_expiry_heap) > 2 * len(_cache) + PURGE_EVERY_WRITES:
+        _expiry_heap[:] = [(exp, key) for key, (_, exp) in _cache.items()]
+        heapq.heapify(_expiry_heap)
+
+
+def purge_expired():
+    """Drop every expired entry now."""
+    with _lock:
+        _purge_expired_locked(time.monotonic_ns())
 
 
 def get_cached_render(url: str):
     key = _cache_key(url)
-    now = time.time()
 
     with _lock:
         entry = _cache.get(key)
         if not entry:
             return None
 
-        html, ts = entry
-        if now - ts > CACHE_TTL_SECONDS:
+        blob, expiry_ns = entry
+        if expiry_ns < time.monotonic_ns():
             del _cache[key]
             return None
 
-        return html
+        _cache.move_to_end(key)
+
+    return zlib.decompress(blob).decode("utf-8")
 
 
 def set_cached_render(url: str, html: str):
+    global _writes
+
     key = _cache_key(url)
+    blob = zlib.compress(html.encode("utf-8"), CACHE_COMPRESS_LEVEL)
+    now_ns = time.monotonic_ns()
+    expiry_ns = now_ns + _TTL_NS
+
     with _lock:
-        _cache[key] = (html, time.time())
+        _cache[key] = (blob, expiry_ns)
+        _cache.move_to_end(key)
+        heapq.heappush(_expiry_heap, (expiry_ns, key))
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+        _writes += 1
+        if _writes % PURGE_EVERY_WRITES == 0:
+            _purge_expired_locked(now_ns)
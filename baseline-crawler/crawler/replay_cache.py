@@ -0,0 +1,154 @@
+"""
+On-disk record/replay store for sub-resource responses during JS renders.
+Keyed by method + normalized URL + request body, so repeat crawls of a site
+serve its scripts/XHR from disk instead of the network.
+
+Documents are never replayed: the page itself must always be fetched live.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+from crawler.config import DATA_DIR, RECORD_REPLAY
+
+REPLAY_DIR = os.path.join(DATA_DIR, "replay")
+
+# Cache-busters and session tokens that change per visit
+VOLATILE_QUERY_PARAMS = {
+    "_", "t", "ts", "timestamp", "cb", "cachebuster", "nocache", "rnd",
+    "sid", "sessionid", "phpsessid", "jsessionid",
+}
+
+
+# Headers describing the wire encoding, not the decoded body we store
+DECODED_BODY_HEADERS = {"content-encoding", "content-length"}
+
+
+def _normalize_request_url(url: str) -> str:
+    p = urlparse(url)
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(p.query, keep_blank_values=True)
+            if k.lower() not in VOLATILE_QUERY_PARAMS
+        )
+    )
+    return urlunparse((p.scheme, p.netloc.lower(), p.path, "", query, ""))
+
+
+def _replay_key(method: str, url: str, body: bytes | None) -> str:
+    # Non-cryptographic dedup key: blake2b, as in render_cache
+    h = hashlib.blake2b(digest_size=16)
+    h.update(method.encode("utf-8"))
+    h.update(_normalize_request_url(url).encode("utf-8"))
+    if body:
+        h.update(body)
+    return h.hexdigest()
+
+
+def _paths(key: str):
+    base = os.path.join(REPLAY_DIR, key[:2], key)
+    return base + ".json", base + ".body"
+
+
+def _atomic_write(path: str, data: bytes):
+    # Unique temp file: render threads of one process store the same
+    # sub-resource concurrently
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_response(key: str):
+    meta_path, body_path = _paths(key)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+        return meta["status"], meta["headers"], body
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store_response(key: str, status: int, headers: dict, body: bytes):
+    meta_path, body_path = _paths(key)
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+
+    # Body first, then metadata: load_response needs both to exist
+    _atomic_write(body_path, body)
+    _atomic_write(
+        meta_path,
+        json.dumps({"status": status, "headers": headers}).encode("utf-8"),
+    )
+
+
+def _replayable_headers(headers: dict) -> dict:
+    # response.body() is already decoded; the original encoding/length
+    # would no longer describe the stored bytes
+    return {
+        k: v for k, v in headers.items()
+        if k.lower() not in DECODED_BODY_HEADERS
+    }
+
+
+def _serve(route):
+    request = route.request
+    if request.resource_type == "document":
+        route.continue_()
+        return
+
+    key = _replay_key(request.method, request.url, request.post_data_buffer)
+
+    if RECORD_REPLAY in ("on", "replay"):
+        hit = load_response(key)
+        if hit:
+            status, headers, body = hit
+            route.fulfill(
+                status=status, headers=_replayable_headers(headers), body=body
+            )
+            return
+        if RECORD_REPLAY == "replay":
+            route.continue_()
+            return
+
+    response = route.fetch()
+    body = response.body()
+    headers = _replayable_headers(response.headers)
+    if 200 <= response.status < 300:
+        try:
+            store_response(key, response.status, headers, body)
+        except OSError as e:
+            print(f"[REPLAY] store failed for {request.url}: {e}")
+    route.fulfill(response=response, headers=headers, body=body)
+
+
+def replay_route(route):
+    """
+    context.route handler implementing RECORD_REPLAY:
+    - "record": always fetch live and store
+    - "replay": serve stored responses, misses go to the network unstored
+    - "on":     serve stored responses, fetch and store misses
+    Any failure hands the request back to Chromium, so a render never
+    stalls on an unanswered route.
+    """
+    try:
+        _serve(route)
+    except Exception as e:
+        print(f"[REPLAY] {route.request.url}: {e}; continuing live")
+        try:
+            route.continue_()
+        except Exception:
+            # Already handled, or the page is gone
+            pass
@@ -1,45 +1,49 @@
 # crawler/storage/baseline_store.py
 
 from pathlib import Path
-from crawler.storage.db import insert_defacement_site
-from crawler.storage.mysql import upsert_baseline_hash, fetch_baseline_hash
+from crawler.storage.mysql import upsert_baseline_with_site, fetch_baseline_hash
 from crawler.normalizer import normalize_url
 from crawler.content_fingerprint import semantic_hash
 
+import itertools
 import threading
 
 BASELINE_ROOT = Path("baselines")
 
-# Global lock and cache for sequence numbers
+# Per-site sequence counters. The lock only guards the one-time disk scan;
+# next() on itertools.count is atomic under the GIL.
 _ID_LOCK = threading.Lock()
-_SITE_MAX_IDS = {}
+_SITE_ID_COUNTERS = {}
 
 
 def _next_baseline_id(site_dir: Path, siteid: int) -> str:
     """
     Thread-safe generation of the next baseline ID.
-    Uses an in-memory cache to avoid O(N) disk scans on every write.
+    Scans the site directory once, then hands out IDs lock-free.
     """
-    with _ID_LOCK:
-        if siteid not in _SITE_MAX_IDS:
-            max_seq = 0
-            prefix = f"{siteid}-"
-            
-            if site_dir.exists():
-                for f in site_dir.glob(f"{siteid}-*.html"):
-                    try:
-                        stem = f.stem
-                        if stem.startswith(prefix):
-                            num = int(stem[len(prefix):])
-                            if num > max_seq:
-                                max_seq = num
-                    except ValueError:
-                        pass
-            
-            _SITE_MAX_IDS[siteid] = max_seq
-
-        _SITE_MAX_IDS[siteid] += 1
-        return f"{siteid}-{_SITE_MAX_IDS[siteid]}"
+    counter = _SITE_ID_COUNTERS.get(siteid)
+    if counter is None:
+        with _ID_LOCK:
+            counter = _SITE_ID_COUNTERS.get(siteid)
+            if counter is None:
+                max_seq = 0
+                prefix = f"{siteid}-"
+
+                if site_dir.exists():
+                    for f in site_dir.glob(f"{siteid}-*.html"):
+                        try:
+                            stem = f.stem
+                            if stem.startswith(prefix):
+                                num = int(stem[len(prefix):])
+                                if num > max_seq:
+                                    max_seq = num
+                        except ValueError:
+                            pass
+
+                counter = itertools.count(max_seq + 1)
+                _SITE_ID_COUNTERS[siteid] = counter
+
+    return f"{siteid}-{next(counter)}"
 
 
 def save_baseline(*, custid, siteid, url, html, base_url=None):
@@ -84,28 +88,21 @@ def save_baseline(*, custid, siteid, url, html, base_url=None):
     )
 
     # --------------------------------------------------
-    # 2️⃣ UPSERT baseline record
-    # --------------------------------------------------
-    upsert_baseline_hash(
-        site_id=siteid,
-        normalized_url=normalized_url,
-        content_hash=content_hash,
-        baseline_path=str(path),
-        base_url=base_url,
-    )
-
-    # --------------------------------------------------
-    # 3️⃣ Overwrite the SAME file every time
+    # 2️⃣ Overwrite the SAME file every time
     # --------------------------------------------------
     path.write_text(html.strip(), encoding="utf-8")
 
     # --------------------------------------------------
-    # 4️⃣ Ensure defacement_sites points to SAME baseline_id
+    # 3️⃣ UPSERT baseline record and point defacement_sites
+    #    to the SAME baseline_id (single transaction)
     # --------------------------------------------------
-    insert_defacement_site(
-        siteid=siteid,
+    upsert_baseline_with_site(
+        site_id=siteid,
         baseline_id=baseline_id,
         url=url,
+        normalized_url=normalized_url,
+        content_hash=content_hash,
+        baseline_path=str(path),
         base_url=base_url,
     )
 
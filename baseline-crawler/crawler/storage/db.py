@@ -2,6 +2,7 @@ from .mysql import *
 
 __all__ = [
     "insert_crawl_page",
+    "insert_crawl_pages",
     "insert_defacement_site",
     "fetch_enabled_sites",
     "insert_crawl_job",
@@ -112,42 +112,50 @@ def fail_crawl_job(job_id, err):
         DB_SEMAPHORE.release()
 
 
-def insert_crawl_page(data):
+CRAWL_PAGE_UPSERT_SQL = """
+    INSERT INTO crawl_pages
+    (job_id, custid, siteid, url, parent_url, depth, status_code,
+     content_type, content_length, response_time_ms, fetched_at)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE
+        job_id=VALUES(job_id),
+        status_code=VALUES(status_code),
+        content_type=VALUES(content_type),
+        content_length=VALUES(content_length),
+        response_time_ms=VALUES(response_time_ms),
+        fetched_at=VALUES(fetched_at)
+"""
+
+
+def _crawl_page_params(data):
     # Pass seed_url if available to ensure domain matches sites table
     base_url = data.get("base_url")
     canonical_url = get_canonical_id(data["url"], base_url)
     if not canonical_url:
-        return
+        return None
 
     # User Req: Skip root domain for crawl_pages table ONLY
   #  if "/" not in canonical_url:
         #return
 
+    return (
+        data["job_id"], data["custid"], data["siteid"],
+        canonical_url, data["parent_url"], data["depth"],
+        data["status_code"], data["content_type"],
+        data["content_length"], data["response_time_ms"],
+        data["fetched_at"],
+    )
+
+
+def insert_crawl_page(data):
+    params = _crawl_page_params(data)
+    if params is None:
+        return
+
     conn = get_connection()
     try:
         cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO crawl_pages
-            (job_id, custid, siteid, url, parent_url, depth, status_code,
-             content_type, content_length, response_time_ms, fetched_at)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON DUPLICATE KEY UPDATE
-                job_id=VALUES(job_id),
-                status_code=VALUES(status_code),
-                content_type=VALUES(content_type),
-                content_length=VALUES(content_length),
-                response_time_ms=VALUES(response_time_ms),
-                fetched_at=VALUES(fetched_at)
-            """,
-            (
-                data["job_id"], data["custid"], data["siteid"],
-                canonical_url, data["parent_url"], data["depth"],
-                data["status_code"], data["content_type"],
-                data["content_length"], data["response_time_ms"],
-                data["fetched_at"],
-            ),
-        )
+        cur.execute(CRAWL_PAGE_UPSERT_SQL, params)
         conn.commit()
         return "Inserted" if cur.rowcount == 1 else "Updated"
     finally:
@@ -156,6 +164,31 @@ def insert_crawl_page(data):
         DB_SEMAPHORE.release()
 
 
+def insert_crawl_pages(rows):
+    """
+    Batch variant of insert_crawl_page.
+    executemany() folds the rows into one multi-VALUES INSERT, so the
+    whole batch costs a single round trip and a single commit.
+    """
+    params = [p for p in map(_crawl_page_params, rows) if p is not None]
+    if not params:
+        return 0
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany(CRAWL_PAGE_UPSERT_SQL, params)
+        conn.commit()
+        return len(params)
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+        DB_SEMAPHORE.release()
+
+
 def insert_defacement_site(siteid, baseline_id, url, base_url=None):
     canonical_url = get_canonical_id(url, base_url)
     if not canonical_url:
@@ -217,6 +250,58 @@ def upsert_baseline_hash(site_id, normalized_url, content_hash, baseline_path, b
 
 
 
+def upsert_baseline_with_site(
+    site_id, baseline_id, url, normalized_url, content_hash, baseline_path,
+    base_url=None,
+):
+    """
+    upsert_baseline_hash + insert_defacement_site in ONE transaction.
+    One connection and one commit per baseline page instead of two, and
+    baseline_pages / defacement_sites can no longer disagree.
+    """
+    baseline_url = get_canonical_id(normalized_url, base_url)
+    site_url = get_canonical_id(url, base_url)
+    if not baseline_url and not site_url:
+        return False
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        conn.start_transaction()
+        if baseline_url:
+            cur.execute(
+                """
+                INSERT INTO baseline_pages
+                    (site_id, normalized_url, content_hash, baseline_path)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    content_hash = VALUES(content_hash),
+                    baseline_path = VALUES(baseline_path)
+                """,
+                (site_id, baseline_url, content_hash, baseline_path),
+            )
+        if site_url:
+            cur.execute(
+                """
+                INSERT INTO defacement_sites (siteid, baseline_id, url, action)
+                VALUES (%s,%s,%s,'selected')
+                ON DUPLICATE KEY UPDATE
+                    baseline_id=VALUES(baseline_id),
+                    action='selected'
+                """,
+                (site_id, baseline_id, site_url),
+            )
+        conn.commit()
+        return bool(baseline_url)
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+        DB_SEMAPHORE.release()
+
+
 def fetch_baseline_hash(site_id, normalized_url, base_url=None):
     conn = get_connection()
     try:
@@ -1,8 +1,10 @@
 # crawler/worker.py
+import os
 import threading
 import time
 import re
 from collections import defaultdict
+from functools import lru_cache
 from urllib.parse import urlparse
 from datetime import datetime, timezone
 
@@ -12,9 +14,10 @@ from crawler.normalizer import (
     normalize_rendered_html,
     normalize_url,
 )
-from crawler.storage.db import insert_crawl_page
+from crawler.storage.db import insert_crawl_page, insert_crawl_pages
 from crawler.storage.baseline_store import save_baseline
 from crawler.compare_engine import CompareEngine
+from crawler.config import CRAWL_PAGE_BATCH_SIZE, DATA_DIR, TRACK_BLOCKED_URLS
 
 from crawler.js_detect import needs_js_rendering
 from crawler.render_cache import get_cached_render, set_cached_render
@@ -39,14 +42,94 @@ QUERY_BLOCK_RULES = {
     "GENERIC_PAGINATION": r"^(page|paged|p)$",
 }
 
+# PATH_BLOCK_RULES folded into ONE regex matched once per URL. Each rule is
+# a lookahead from position 0, tried in dict order, so the first rule that
+# matches anywhere in the path wins (same as looping re.search); its empty
+# named group tells which rule fired.
+_PATH_BLOCK_RE = re.compile(
+    "^(?:"
+    + "|".join(f"(?=.*?(?:{r}))(?P<{k}>)" for k, r in PATH_BLOCK_RULES.items())
+    + ")",
+    re.DOTALL,
+)
+
+_EPAGE_QUERY_RE = re.compile(r'(^|&)(e-page-[0-9a-fA-F]+)=')
+
 STATIC_EXTENSIONS = (
     ".css", ".js", ".png", ".jpg", ".jpeg", ".webp",
     ".gif", ".svg", ".ico", ".woff", ".woff2",
     ".ttf", ".eot", ".pdf", ".zip"
 )
 
-BLOCK_REPORT = defaultdict(lambda: {"count": 0, "urls": []})
-BLOCK_LOCK = threading.Lock()
+# Per-thread block tallies: each worker thread updates its own shard
+# without a lock; shards are only merged when the report is read.
+# With TRACK_BLOCKED_URLS, each thread streams "type<TAB>url" lines to its
+# own file under BLOCKED_URLS_DIR instead of keeping them in memory; the
+# file is named after the job and worker and closed when the worker exits.
+BLOCKED_URLS_DIR = os.path.join(DATA_DIR, "blocked_urls")
+
+_BLOCK_SHARDS = []
+_BLOCK_FILES = []
+_BLOCK_SHARDS_LOCK = threading.Lock()
+_block_local = threading.local()
+
+
+def _register_block_shard(file_tag: str | None = None):
+    shard = _block_local.shard = defaultdict(int)
+    fp = None
+    if TRACK_BLOCKED_URLS:
+        os.makedirs(BLOCKED_URLS_DIR, exist_ok=True)
+        if file_tag is None:
+            file_tag = f"{os.getpid()}-{threading.current_thread().name}"
+        fp = open(
+            os.path.join(BLOCKED_URLS_DIR, f"{file_tag}.tsv"),
+            "a",
+            encoding="utf-8",
+            buffering=1 << 16,
+        )
+    _block_local.fp = fp
+
+    with _BLOCK_SHARDS_LOCK:
+        _BLOCK_SHARDS.append(shard)
+        if fp:
+            _BLOCK_FILES.append(fp)
+    return shard
+
+
+def _close_block_shard():
+    """Flush and close this thread's blocked-URL file; counts are kept."""
+    fp = getattr(_block_local, "fp", None)
+    _block_local.shard = None
+    _block_local.fp = None
+    if fp is None:
+        return
+    with _BLOCK_SHARDS_LOCK:
+        _BLOCK_FILES.remove(fp)
+    fp.close()
+
+
+def record_block(block_type: str, url: str):
+    shard = getattr(_block_local, "shard", None)
+    if shard is None:
+        shard = _register_block_shard()
+
+    shard[block_type] += 1
+    if _block_local.fp:
+        _block_local.fp.write(f"{block_type}\t{url}\n")
+
+
+def get_block_report():
+    """Merge every thread's block counts into {block_type: count}."""
+    report = defaultdict(int)
+    with _BLOCK_SHARDS_LOCK:
+        shards = list(_BLOCK_SHARDS)
+        for fp in _BLOCK_FILES:
+            fp.flush()
+
+    for shard in shards:
+        for block_type, count in list(shard.items()):
+            report[block_type] += count
+    return report
 
 
 def classify_block(url: str):
@@ -56,25 +139,28 @@ def classify_block(url: str):
         return "STATIC"
 
     if parsed.query:
-        if re.search(r'(^|&)(e-page-[0-9a-fA-F]+)=', parsed.query):
+        if _EPAGE_QUERY_RE.search(parsed.query):
             return "BLOG_EPAGE"
 
-    for k, r in PATH_BLOCK_RULES.items():
-        if re.search(r, parsed.path.lower()):
-            return k
-
-    return None
+    m = _PATH_BLOCK_RE.match(parsed.path.lower())
+    return m.lastgroup if m else None
 
 
 # ==================================================
 # STRICT DOMAIN FILTER
 # ==================================================
 
-def _allowed_domain(seed_url: str, candidate_url: str) -> bool:
+@lru_cache(maxsize=64)
+def _seed_base_host(seed_url: str) -> str:
+    # Same seed for every link of a crawl: parse it once
     seed_netloc = urlparse(seed_url).netloc.lower().split(":")[0]
+    return seed_netloc[4:] if seed_netloc.startswith("www.") else seed_netloc
+
+
+def _allowed_domain(seed_url: str, candidate_url: str) -> bool:
     cand_netloc = urlparse(candidate_url).netloc.lower().split(":")[0]
 
-    base = seed_netloc[4:] if seed_netloc.startswith("www.") else seed_netloc
+    base = _seed_base_host(seed_url)
     return cand_netloc == base or cand_netloc == f"www.{base}"
 
 
@@ -104,6 +190,9 @@ class Worker(threading.Thread):
         self.seed_url = seed_url
         self.original_site_url = original_site_url
 
+        # crawl_pages rows waiting for the next batched INSERT
+        self._page_rows = []
+
         self.compare_engine = (
             CompareEngine(custid=self.custid)
             if crawl_mode == "COMPARE"
@@ -144,19 +233,48 @@ class Worker(threading.Thread):
             # absolute fallback
             return fetched_url
 
+    def _flush_pages(self):
+        if not self._page_rows:
+            return
+        rows, self._page_rows = self._page_rows, []
+        try:
+            insert_crawl_pages(rows)
+            return
+        except Exception as e:
+            print(
+                f"[{self.name}] crawl_pages batch insert failed ({len(rows)} rows): {e}; "
+                "retrying row by row"
+            )
+
+        # Batch was rolled back: retry singly so only bad rows are lost
+        for row in rows:
+            try:
+                insert_crawl_page(row)
+            except Exception as e:
+                print(f"[{self.name}] crawl_pages insert failed for {row['url']}: {e}")
 
     def run(self):
+        _register_block_shard(f"{self.job_id}-{self.name}")
+        try:
+            self._crawl()
+        finally:
+            self._flush_pages()
+            _close_block_shard()
+
+    def _crawl(self):
         print(f"[{self.name}] started ({self.crawl_mode})")
 
         while self.running:
             (item, got_task) = self.frontier.dequeue()
 
             if not got_task:
+                # Idle: don't hold buffered rows back while waiting
+                self._flush_pages()
                 time.sleep(0.1)
                 continue
 
             url, parent, depth = item
-            start = time.time()
+            start = time.monotonic()
 
             try:
                 print(f"[{self.name}] Crawling {url}")
@@ -167,9 +285,7 @@ class Worker(threading.Thread):
                 if not result["success"]:
                     err = result.get("error", "unknown")
                     if isinstance(err, str) and "ignored content type" in err:
-                        with BLOCK_LOCK:
-                            BLOCK_REPORT["FETCH_IGNORED_CONTENT_TYPE"]["count"] += 1
-                            BLOCK_REPORT["FETCH_IGNORED_CONTENT_TYPE"]["urls"].append(url)
+                        record_block("FETCH_IGNORED_CONTENT_TYPE", url)
                         continue
                     print(f"[{self.name}] Fetch failed for {url}: {err}")
                     continue
@@ -178,7 +294,7 @@ class Worker(threading.Thread):
                 ct = resp.headers.get("Content-Type", "")
 
                 # ✅ STORE DB URL CORRECTLY
-                insert_crawl_page({
+                self._page_rows.append({
                     "job_id": self.job_id,
                     "custid": self.custid,
                     "siteid": self.siteid,
@@ -188,9 +304,11 @@ class Worker(threading.Thread):
                     "status_code": resp.status_code,
                     "content_type": ct,
                     "content_length": len(resp.content),
-                    "response_time_ms": int((time.time() - start) * 1000),
+                    "response_time_ms": int((time.monotonic() - start) * 1000),
                     "fetched_at": fetched_at,
                 })
+                if len(self._page_rows) >= CRAWL_PAGE_BATCH_SIZE:
+                    self._flush_pages()
 
                 if "text/html" not in ct.lower():
                     continue
@@ -236,15 +354,11 @@ class Worker(threading.Thread):
                 for u in urls:
                     block_type = classify_block(u)
                     if block_type:
-                        with BLOCK_LOCK:
-                            BLOCK_REPORT[block_type]["count"] += 1
-                            BLOCK_REPORT[block_type]["urls"].append(u)
+                        record_block(block_type, u)
                         continue
 
                     if not _allowed_domain(self.seed_url, u):
-                        with BLOCK_LOCK:
-                            BLOCK_REPORT["DOMAIN_FILTER"]["count"] += 1
-                            BLOCK_REPORT["DOMAIN_FILTER"]["urls"].append(u)
+                        record_block("DOMAIN_FILTER", u)
                         continue
 
                     self.frontier.enqueue(u, url, depth + 1)
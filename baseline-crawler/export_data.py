@@ -40,7 +40,7 @@ def export_domain_data():
 
         # Write to JSON
         with open(json_file, 'w') as f:
-            json.dump(data, f, indent=4)
+            f.write(json.dumps(data, indent=4))
 
         conn.close()
         print(f"Exported {len(data)} records for domain {domain} to {json_file}")
@@ -16,7 +16,7 @@ import argparse # Added argparse
 
 from crawler.frontier import Frontier
 from crawler.worker import Worker
-from crawler.normalizer import normalize_url
+from crawler.normalizer import clear_normalizer_caches, normalize_url
 from crawler.storage.db import (
     check_db_health,
     fetch_enabled_sites,
@@ -27,7 +27,8 @@ from crawler.storage.db import (
 from crawler.storage.mysql import fetch_site_info_by_baseline_id # Added import
 from crawler.baseline_worker import BaselineWorker
 
-from crawler.worker import BLOCK_REPORT
+from crawler.worker import BLOCKED_URLS_DIR, get_block_report
+from crawler.config import TRACK_BLOCKED_URLS
 
 CRAWL_MODE = os.getenv("CRAWL_MODE", "CRAWL").upper()
 assert CRAWL_MODE in ("BASELINE", "CRAWL", "COMPARE")
@@ -126,6 +127,9 @@ def main():
 
     # ---------------- PER SITE ----------------
     for site in sites:
+        # URL memo is per site; don't carry the previous site's links
+        clear_normalizer_caches()
+
         siteid = site["siteid"]
         custid = site["custid"]
 
@@ -154,7 +158,7 @@ def main():
                 start_url=original_site_url,
             )
 
-            start_time = time.time()
+            start_time = time.monotonic()
 
             # ====================================================
             # BASELINE MODE (NO CRAWLING, NO WORKERS)
@@ -169,21 +173,24 @@ def main():
                     target_urls=target_urls, # Pass the filter
                 ).run()
 
-                duration = time.time() - start_time
+                duration = time.monotonic() - start_time
 
                 complete_crawl_job(
                     job_id=job_id,
                     pages_crawled=0,
                 )
 
-                print("\n" + "-" * 60)
-                print("BASELINE COMPLETED")
-                print("-" * 60)
-                print(f"Job ID        : {job_id}")
-                print(f"Customer ID   : {custid}")
-                print(f"Site ID       : {siteid}")
-                print(f"Duration      : {duration:.2f} seconds")
-                print("-" * 60)
+                # Emit the summary as one write so it isn't interleaved
+                print("\n".join([
+                    "\n" + "-" * 60,
+                    "BASELINE COMPLETED",
+                    "-" * 60,
+                    f"Job ID        : {job_id}",
+                    f"Customer ID   : {custid}",
+                    f"Site ID       : {siteid}",
+                    f"Duration      : {duration:.2f} seconds",
+                    "-" * 60,
+                ]))
 
                 continue  # 🔑 VERY IMPORTANT (skip crawler logic)
 
@@ -220,7 +227,7 @@ def main():
             for w in workers:
                 w.join()
 
-            duration = time.time() - start_time
+            duration = time.monotonic() - start_time
             stats = frontier.get_stats()
 
             complete_crawl_job(
@@ -228,18 +235,21 @@ def main():
                 pages_crawled=stats["visited_count"],
             )
 
-            print("\n" + "-" * 60)
-            print("CRAWL COMPLETED")
-            print("-" * 60)
-            print(f"Job ID            : {job_id}")
-            print(f"Customer ID       : {custid}")
-            print(f"Site ID           : {siteid}")
-            print(f"Seed URL (crawl)  : {start_url}")
-            print(f"URL (DB)          : {original_site_url}")
-            print(f"Total URLs visited: {stats['visited_count']}")
-            print(f"Crawl duration    : {duration:.2f} seconds")
-            print(f"Workers used      : {len(workers)}")
-            print("-" * 60)
+            # Emit the summary as one write so it isn't interleaved
+            print("\n".join([
+                "\n" + "-" * 60,
+                "CRAWL COMPLETED",
+                "-" * 60,
+                f"Job ID            : {job_id}",
+                f"Customer ID       : {custid}",
+                f"Site ID           : {siteid}",
+                f"Seed URL (crawl)  : {start_url}",
+                f"URL (DB)          : {original_site_url}",
+                f"Total URLs visited: {stats['visited_count']}",
+                f"Crawl duration    : {duration:.2f} seconds",
+                f"Workers used      : {len(workers)}",
+                "-" * 60,
+            ]))
         except Exception as e:
             fail_crawl_job(job_id=job_id, err=str(e))
             print(f"ERROR: Crawl job {job_id} failed: {e}")
@@ -254,19 +264,12 @@ def main():
 if __name__ == "__main__":
     main()
 
-    if BLOCK_REPORT:
-        print("\n" + "=" * 60)
-        print("BLOCKED URL REPORT")
-        print("=" * 60)
-        for block_type, data in BLOCK_REPORT.items():
-            try:
-                count = len(data)
-                urls = list(data)
-            except Exception:
-                count = 0
-                urls = []
-
-            print(f"[{block_type}] {count} URLs blocked")
-            for u in urls:
-                print(f"  - {u}")
-        print("=" * 60)
+    block_report = get_block_report()
+    if block_report:
+        report = ["\n" + "=" * 60, "BLOCKED URL REPORT", "=" * 60]
+        for block_type, count in block_report.items():
+            report.append(f"[{block_type}] {count} URLs blocked")
+        if TRACK_BLOCKED_URLS:
+            report.append(f"Blocked URLs written to: {BLOCKED_URLS_DIR}")
+        report.append("=" * 60)
+        print("\n".join(report))